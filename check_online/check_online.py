@@ -8,29 +8,71 @@ Script to check if a set of URLs are accessible or not.
 ## Updates
 ## Software version # Date
 1.0 # 2024-12-04: initial version
+1.1 # 2026-10-15: check URLs concurrently over a shared session
+1.2 # 2026-10-15: switch to asyncio + httpx (HTTP/2) for the checks
+1.3 # 2026-10-15: scan only the first 64 KB of each page body; drop the HEAD probe
 """
-import requests
+import asyncio
+import httpx
 import sys
 
-def check_urls(file_path):
+BODY_SCAN_BYTES = 65536  # how much of each page body is scanned
+NOT_FOUND_MARKER = b"Page not found"
+
+def _read_urls(file_path):
     try:
         with open(file_path, 'r') as file:
-            url_list = [line.strip() for line in file if line.strip()]
+            return [line.strip() for line in file if line.strip()]
     except FileNotFoundError:
         print(f"Error: File not found: {file_path}")
         return []
 
-    results = []
-    for url in url_list:
+async def _reports_not_found(response):
+    """Scan the start of a streamed body for NOT_FOUND_MARKER, stopping at the first match."""
+    scanned = 0
+    tail = b""
+    async for chunk in response.aiter_bytes():
+        chunk = chunk[:BODY_SCAN_BYTES - scanned]
+        # Prepend the end of the previous chunk in case the marker spans both
+        if NOT_FOUND_MARKER in tail + chunk:
+            return True
+        scanned += len(chunk)
+        if scanned >= BODY_SCAN_BYTES:
+            break
+        tail = (tail + chunk)[-(len(NOT_FOUND_MARKER) - 1):]
+    return False
+
+async def _check(client, semaphore, url):
+    """Check a single URL and return a (url, status, info) tuple."""
+    async with semaphore:
         try:
-            response = requests.get(url, timeout=10)
-            if response.status_code == 200 and "Page not found" not in response.text:
-                results.append((url, "Accessible", response.status_code))
-            else:
-                results.append((url, "Content issue", response.status_code))
+            # The status comes from the GET itself rather than a HEAD probe,
+            # since some servers reject HEAD but serve GET normally.
+            # The body is only needed for the "Page not found" check, and that
+            # message shows up in the title or early body, so at most the first
+            # BODY_SCAN_BYTES (64 KB) are read before the connection is released
+            async with client.stream("GET", url, follow_redirects=True) as response:
+                if response.status_code == 200 and not await _reports_not_found(response):
+                    return (url, "Accessible", response.status_code)
+            return (url, "Content issue", response.status_code)
         except Exception as e:
-            results.append((url, "Failed", str(e)))
-    return results
+            return (url, "Failed", str(e))
+
+async def check_urls_async(url_list):
+    # All checks share one event loop; HTTP/2 multiplexes requests to the
+    # same host over a single connection
+    semaphore = asyncio.Semaphore(64)
+    # Keep every connection the checks can use alive for reuse (httpx keeps
+    # only 20 by default)
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=64)
+    async with httpx.AsyncClient(http2=True, timeout=10, limits=limits) as client:
+        return await asyncio.gather(*[_check(client, semaphore, url) for url in url_list])
+
+def check_urls(file_path):
+    url_list = _read_urls(file_path)
+    if not url_list:
+        return []
+    return asyncio.run(check_urls_async(url_list))
 
 if __name__ == "__main__":
     if len(sys.argv) != 2:
@@ -0,0 +1,75 @@
+"""
+Numba kernels for crop_png_images.py.
+
+Importing this module compiles the kernels eagerly, so it raises ImportError
+when numba is not installed and the caller falls back to plain NumPy.
+"""
+
+from numba import njit
+
+@njit(inline='always')
+def _is_content(rgb, y, x, thr):
+    return rgb[y, x, 0] < thr or rgb[y, x, 1] < thr or rgb[y, x, 2] < thr
+
+# Compiled for read-only input, which is what np.asarray() on a PIL image gives;
+# writable arrays are accepted too. Not cached on disk: numba's cache is keyed
+# by source file and fails to load when the module was compiled under the other
+# of its two names (_kernels when run as a script, crop_png._kernels)
+@njit("(Array(uint8, 3, 'A', readonly=True), uint8)")
+def bounds(rgb, thr):
+    """
+    Find the content bounding box of an RGB array.
+
+    Scans inward from each edge and stops at the first row/column holding a
+    pixel with any channel below thr, so only the blank border and one line
+    of content are read.
+
+    Args:
+        rgb: HxWx3 uint8 array
+        thr: Threshold below which a channel counts as content
+
+    Returns:
+        tuple: (left, top, right, bottom), or (-1, -1, -1, -1) if the image
+        has no content
+    """
+    height, width, _ = rgb.shape
+
+    top = -1
+    for y in range(height):
+        for x in range(width):
+            if _is_content(rgb, y, x, thr):
+                top = y
+                break
+        if top >= 0:
+            break
+    if top < 0:
+        return (-1, -1, -1, -1)
+
+    bottom = top
+    for y in range(height - 1, top, -1):
+        for x in range(width):
+            if _is_content(rgb, y, x, thr):
+                bottom = y
+                break
+        if bottom > top:
+            break
+
+    left = -1
+    for x in range(width):
+        for y in range(top, bottom + 1):
+            if _is_content(rgb, y, x, thr):
+                left = x
+                break
+        if left >= 0:
+            break
+
+    right = left
+    for x in range(width - 1, left, -1):
+        for y in range(top, bottom + 1):
+            if _is_content(rgb, y, x, thr):
+                right = x
+                break
+        if right > left:
+            break
+
+    return (left, top, right + 1, bottom + 1)
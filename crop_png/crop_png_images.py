@@ -5,12 +5,81 @@ Detects content boundaries and crops to the minimum area containing the actual c
 Works with any type of image content - charts, diagrams, photos, etc.
 """
 
+import itertools
+import multiprocessing
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 import numpy as np
 from pathlib import Path
 
+# Pixels whose RGB values are all at or above this are considered empty
+CONTENT_THRESHOLD = 240
+
+# Optional boundary detection kernel compiled with numba, see use_numba_kernel
+_numba_bounds = None
+
+def use_numba_kernel():
+    """
+    Switch boundary detection to the numba kernel in _kernels.py.
+    
+    The kernel does the same edge scan as the NumPy code, a few times faster
+    per image, but importing numba costs about half a second per process.
+    It only pays off on many images with wide blank borders, so it is opt-in.
+    
+    Returns:
+        bool: True if the kernel is available (numba is installed)
+    """
+    global _numba_bounds
+    try:
+        if __package__:
+            from ._kernels import bounds
+        else:
+            from _kernels import bounds
+    except ImportError:
+        return False
+    _numba_bounds = bounds
+    return True
+
+def _scan_edges(img_array, threshold):
+    """
+    Find the content box of an RGB array by scanning inward from each edge.
+    
+    Each scan stops at the first row/column holding a non-empty pixel (any
+    channel below the threshold), so only the blank border and one line of
+    content are ever examined.
+    
+    Args:
+        img_array: HxWx3 uint8 array
+        threshold: Channel value below which a pixel counts as content
+        
+    Returns:
+        tuple: (left, top, right, bottom), or None if there is no content
+    """
+    height, width = img_array.shape[:2]
+    
+    top = 0
+    while top < height and not (img_array[top] < threshold).any():
+        top += 1
+    
+    if top == height:
+        return None
+    
+    bottom = height
+    while not (img_array[bottom - 1] < threshold).any():
+        bottom -= 1
+    
+    left = 0
+    while not (img_array[top:bottom, left] < threshold).any():
+        left += 1
+    
+    right = width
+    while not (img_array[top:bottom, right - 1] < threshold).any():
+        right -= 1
+    
+    return (left, top, right, bottom)
+
 def find_content_boundaries(image):
     """
     Find the boundaries of content in an image by detecting non-white pixels.
@@ -26,32 +95,26 @@ def find_content_boundaries(image):
         image = image.convert('RGB')
     
     # Convert to numpy array for easier processing
-    img_array = np.array(image)
+    img_array = np.asarray(image)
     
     # Define what we consider "empty" (white or very light colors)
     # We'll use a threshold to detect non-empty pixels
-    threshold = 240  # Pixels with RGB values above this are considered empty
+    threshold = CONTENT_THRESHOLD
     
-    # Create a mask for non-empty pixels
-    non_empty_mask = np.any(img_array < threshold, axis=2)
+    if _numba_bounds is not None:
+        left, top, right, bottom = _numba_bounds(img_array, np.uint8(threshold))
+        if bottom < 0:
+            # If no content found, return the full image dimensions
+            return (0, 0, image.width, image.height)
+        return (left, top, right, bottom)
     
-    if not np.any(non_empty_mask):
+    box = _scan_edges(img_array, threshold)
+    if box is None:
         # If no content found, return the full image dimensions
         return (0, 0, image.width, image.height)
-    
-    # Find the boundaries of non-empty content
-    rows = np.any(non_empty_mask, axis=1)
-    cols = np.any(non_empty_mask, axis=0)
-    
-    # Get the first and last rows/columns with content
-    top = np.argmax(rows)
-    bottom = len(rows) - np.argmax(rows[::-1])
-    left = np.argmax(cols)
-    right = len(cols) - np.argmax(cols[::-1])
-    
-    return (left, top, right, bottom)
+    return box
 
-def crop_image(image_path, output_path=None, margin=10):
+def crop_image(image_path, output_path=None, margin=10, compress_level=1):
     """
     Crop an image to remove empty areas around the content.
     
@@ -59,6 +122,7 @@ def crop_image(image_path, output_path=None, margin=10):
         image_path: Path to the input image
         output_path: Path for the output image (if None, overwrites original)
         margin: Additional margin to add around the content (in pixels)
+        compress_level: zlib level for the saved PNG (0-9, lower is faster)
         
     Returns:
         bool: True if cropping was successful, False otherwise
@@ -88,7 +152,7 @@ def crop_image(image_path, output_path=None, margin=10):
                 output_path = image_path
             
             # Save the cropped image
-            cropped_img.save(output_path, 'PNG')
+            cropped_img.save(output_path, 'PNG', compress_level=compress_level, optimize=False)
             
             print(f"Cropped {image_path} from {img.size} to {cropped_img.size}")
             return True
@@ -97,7 +161,30 @@ def crop_image(image_path, output_path=None, margin=10):
         print(f"Error processing {image_path}: {e}")
         return False
 
-def process_directory(directory_path, pattern="*.png", margin=10):
+def crop_image_worker(job):
+    """
+    Process pool entry point for crop_image.
+    
+    Args:
+        job: (image_path, output_path, margin, compress_level) tuple
+        
+    Returns:
+        bool: True if cropping was successful, False otherwise
+    """
+    return crop_image(*job)
+
+def _init_worker(use_numba):
+    """
+    Process pool initializer for process_directory.
+    
+    Args:
+        use_numba: Whether the worker should use the numba kernel
+    """
+    if use_numba:
+        use_numba_kernel()
+
+def process_directory(directory_path, pattern="*.png", margin=10, compress_level=1,
+                      use_numba=False):
     """
     Process all PNG files matching the pattern in a directory.
     
@@ -105,6 +192,8 @@ def process_directory(directory_path, pattern="*.png", margin=10):
         directory_path: Path to the directory containing images
         pattern: Glob pattern to match files (default: all PNG files)
         margin: Additional margin to add around content
+        compress_level: zlib level for the saved PNGs (0-9, lower is faster)
+        use_numba: Use the numba kernel for boundary detection in the workers
     """
     directory = Path(directory_path)
     
@@ -112,24 +201,31 @@ def process_directory(directory_path, pattern="*.png", margin=10):
         print(f"Directory {directory_path} does not exist.")
         return
     
-    # Find all matching PNG files
-    png_files = list(directory.glob(pattern))
+    # Find matching PNG files lazily, so cropping starts as soon as the first
+    # match is found instead of after the whole directory has been listed
+    png_files = directory.glob(pattern)
+    first_file = next(png_files, None)
     
-    if not png_files:
+    if first_file is None:
         print(f"No PNG files found matching pattern '{pattern}' in {directory_path}")
         return
     
-    print(f"Found {len(png_files)} PNG files to process:")
-    for file in png_files:
-        print(f"  - {file.name}")
-    
-    # Process each file
+    # Process the files in parallel, one worker process per core
+    jobs = ((file_path, None, margin, compress_level)
+            for file_path in itertools.chain([first_file], png_files))
+    total = 0
     successful = 0
-    for file_path in png_files:
-        if crop_image(file_path, margin=margin):
-            successful += 1
+    # Workers are spawned on every platform, as they are on Windows, and set up
+    # the numba kernel themselves in _init_worker
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=context,
+                             initializer=_init_worker, initargs=(use_numba,)) as executor:
+        for ok in executor.map(crop_image_worker, jobs, chunksize=8):
+            total += 1
+            if ok:
+                successful += 1
     
-    print(f"\nProcessing complete: {successful}/{len(png_files)} files cropped successfully.")
+    print(f"\nProcessing complete: {successful}/{total} files cropped successfully.")
 
 def main():
     """Main function to handle command line arguments."""
@@ -142,14 +238,23 @@ def main():
                        help="Margin to add around content (default: 10 pixels)")
     parser.add_argument("-p", "--pattern", default="*.png",
                        help="File pattern for directory processing (default: *.png)")
+    parser.add_argument("-c", "--compress-level", type=int, default=1, choices=range(10),
+                       metavar="{0-9}",
+                       help="PNG compression level, higher is smaller but slower (default: 1)")
+    parser.add_argument("--numba", action="store_true",
+                       help="Use the numba kernel for boundary detection (requires numba)")
     
     args = parser.parse_args()
     
+    if args.numba and not use_numba_kernel():
+        print("numba is not installed, using NumPy for boundary detection.")
+        args.numba = False
+    
     path = Path(args.path)
     
     if path.is_file():
         # Process single file
-        if crop_image(path, args.output, args.margin):
+        if crop_image(path, args.output, args.margin, args.compress_level):
             print("File processed successfully.")
         else:
             print("Failed to process file.")
@@ -157,7 +262,7 @@ def main():
     
     elif path.is_dir():
         # Process directory
-        process_directory(path, args.pattern, args.margin)
+        process_directory(path, args.pattern, args.margin, args.compress_level, args.numba)
     
     else:
         print(f"Path {args.path} does not exist.")
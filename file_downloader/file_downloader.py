@@ -17,18 +17,35 @@ Usage:
 """
 
 import os
-import re
+import shutil
 import sys
 import argparse
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from urllib.parse import urljoin, urlparse
 from pathlib import Path
 import time
-from bs4 import BeautifulSoup
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from bs4 import BeautifulSoup, SoupStrainer
 from tqdm import tqdm
 
+# Bytes copied per read/write while downloading, and buffered before each
+# write to disk
+CHUNK_SIZE = 256 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Minimum time in seconds between starting two downloads from the same host
+HOST_MIN_INTERVAL = 0.5
+
+# Only <a href> and <base href> tags are needed from a page
+LINK_TAGS = SoupStrainer(['a', 'base'], href=True)
+
 class FileDownloader:
-    def __init__(self, download_dir="downloads", resume=True, file_type="pdf"):
+    def __init__(self, download_dir="downloads", resume=True, file_type="pdf", max_workers=16):
         """
         Initialize the file downloader
         
@@ -36,87 +53,158 @@ class FileDownloader:
             download_dir (str): Directory to save downloaded files
             resume (bool): Whether to resume interrupted downloads
             file_type (str): File extension to download (e.g., "pdf", "pse", "docx")
+            max_workers (int): Number of files to download in parallel
         """
         self.download_dir = Path(download_dir)
         self.download_dir.mkdir(exist_ok=True)
         self.resume = resume
         self.file_type = file_type.lower()
+        # Substrings used by _is_file_link, built once rather than per link
+        self._extension = f'.{self.file_type}'
+        self._type_dir = f'/{self.file_type}/'
+        self.max_workers = max_workers
+        # Per-host (lock, time of last request) pairs used by _wait_for_host
+        self._host_locks = {}
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        # Keep enough pooled connections for all download threads, and retry
+        # transient server errors with a short backoff
+        retries = Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=64, pool_maxsize=64, max_retries=retries)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+    def parse_html(self, html_content):
+        """
+        Parse the link-related tags of an HTML page
         
+        Args:
+            html_content (str): HTML content to parse
+            
+        Returns:
+            BeautifulSoup: Tree holding only the <a href> and <base href> tags
+        """
+        return BeautifulSoup(html_content, 'lxml', parse_only=LINK_TAGS)
+    
     def find_file_links(self, html_content, base_url=None):
         """
         Extract file links from HTML content
         
         Args:
-            html_content (str): HTML content to parse
+            html_content (str or BeautifulSoup): HTML content, or a tree
+                already returned by parse_html
             base_url (str): Base URL for resolving relative links
             
         Returns:
             list: List of file URLs found
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
+        if isinstance(html_content, BeautifulSoup):
+            soup = html_content
+        else:
+            soup = self.parse_html(html_content)
         file_links = []
+        seen_hrefs = set()
+        seen_links = set()
         
         # Find all links
         for link in soup.find_all('a', href=True):
             href = link['href']
             
+            # Repeated links are skipped before any further work
+            if href in seen_hrefs:
+                continue
+            seen_hrefs.add(href)
+            
             # Check if it's a file link of the specified type
             if self._is_file_link(href):
                 # Resolve relative URLs
                 if base_url and not href.startswith(('http://', 'https://')):
                     href = urljoin(base_url, href)
                 
-                file_links.append(href)
+                # Different hrefs can still resolve to the same URL
+                if href not in seen_links:
+                    seen_links.add(href)
+                    file_links.append(href)
         
-        return list(set(file_links))  # Remove duplicates
+        return file_links
     
     def _is_file_link(self, href):
         """Check if a link points to a file of the specified type"""
-        # Direct file links
-        if href.lower().endswith(f'.{self.file_type}'):
-            return True
+        href = href.lower()
         
-        # Links that contain the file type in the URL
-        if f'.{self.file_type}' in href.lower():
+        # Direct file links, or links that contain the file type in the URL
+        # (this also covers "file.pdf?..." and "/download/.../file.pdf")
+        if self._extension in href:
             return True
         
-        # Links that might redirect to files of the specified type
-        file_patterns = [
-            rf'\.{self.file_type}$',
-            rf'\.{self.file_type}\?',
-            rf'\.{self.file_type}#',
-            rf'/{self.file_type}/',
-            rf'/download.*\.{self.file_type}'
-        ]
-        
-        for pattern in file_patterns:
-            if re.search(pattern, href.lower()):
-                return True
-        
-        return False
+        # Links into a directory named after the file type, e.g. "/pdf/"
+        return self._type_dir in href
     
     def get_filename_from_url(self, url):
         """Extract filename from URL"""
         parsed = urlparse(url)
         filename = os.path.basename(parsed.path)
         
-        # If no filename in URL, create one
+        # If no filename in URL, create one; the name is derived from a stable
+        # digest of the URL so that re-runs pick the same file to resume
         if not filename or not filename.endswith(f'.{self.file_type}'):
-            filename = f"document_{hash(url) % 10000}.{self.file_type}"
+            filename = f"document_{self._url_digest(url)}.{self.file_type}"
         
         return filename
     
-    def download_file(self, url, filename=None):
+    def _url_digest(self, url):
+        """Return a short digest of a URL that is stable across runs"""
+        return hashlib.blake2b(url.encode('utf-8'), digest_size=6).hexdigest()
+    
+    def _get_validator(self, response):
+        """
+        Return the value that identifies the version of a downloaded file
+        
+        This is sent as If-Range when the download is resumed, so the server
+        only sends the remaining bytes if the file has not changed. Weak ETags
+        are not allowed in If-Range; Last-Modified is used instead.
+        
+        Returns:
+            str: Strong ETag or Last-Modified date, or None if there is neither
+        """
+        etag = response.headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            return etag
+        return response.headers.get('Last-Modified')
+    
+    def _unique_filenames(self, file_links):
+        """
+        Map each URL to the filename it is saved as, keeping the names distinct
+        
+        URLs such as /a/doc.pdf and /b/doc.pdf share a basename; each of them
+        gets the URL digest added to its name so parallel downloads never
+        write to the same file. Names are compared case-insensitively for
+        filesystems that ignore case.
+        
+        Args:
+            file_links (list): URLs to download
+            
+        Returns:
+            dict: Filename for each URL
+        """
+        filenames = {url: self.get_filename_from_url(url) for url in file_links}
+        counts = Counter(name.lower() for name in filenames.values())
+        for url, name in filenames.items():
+            if counts[name.lower()] > 1:
+                stem, ext = os.path.splitext(name)
+                filenames[url] = f"{stem}_{self._url_digest(url)}{ext}"
+        return filenames
+    
+    def download_file(self, url, filename=None, show_progress=True):
         """
         Download a single file
         
         Args:
             url (str): URL of the file to download
             filename (str): Optional filename to save as
+            show_progress (bool): Whether to show a progress bar for this file
             
         Returns:
             bool: True if download successful, False otherwise
@@ -125,36 +213,80 @@ class FileDownloader:
             filename = self.get_filename_from_url(url)
         
         filepath = self.download_dir / filename
+        # Data is written to a .part file that only gets the final name once
+        # the download has finished, so a file under the final name is complete
+        partpath = filepath.with_name(filepath.name + '.part')
+        # Holds the ETag or Last-Modified of the remote file the .part file is from
+        validatorpath = filepath.with_name(filepath.name + '.part.validator')
         
         # Check if file already exists and resume is enabled
         if filepath.exists() and self.resume:
-            print(f"File {filename} already exists, skipping...")
+            tqdm.write(f"File {filename} already exists, skipping...")
             return True
         
+        # A .part file left by an earlier run is resumed from where it stopped,
+        # as long as there is a validator to check the remote file against
+        existing = 0
+        if self.resume and partpath.exists() and validatorpath.exists():
+            validator = validatorpath.read_text(encoding='utf-8').strip()
+            if validator:
+                existing = partpath.stat().st_size
+        
         try:
-            print(f"Downloading: {url}")
-            response = self.session.get(url, stream=True)
+            # Ask for the raw bytes so that byte ranges match the file on disk
+            headers = {'Accept-Encoding': 'identity'}
+            if existing:
+                tqdm.write(f"Resuming: {url} from byte {existing}")
+                headers['Range'] = f'bytes={existing}-'
+                headers['If-Range'] = validator
+                response = self.session.get(url, stream=True, headers=headers)
+                # The .part file no longer fits the remote file, or the server
+                # sent a different range than asked for; start over
+                content_range = response.headers.get('Content-Range', '')
+                if (response.status_code == 416 or response.status_code == 206
+                        and not content_range.startswith(f'bytes {existing}-')):
+                    response.close()
+                    existing = 0
+                    del headers['Range'], headers['If-Range']
+            if not existing:
+                tqdm.write(f"Downloading: {url}")
+                response = self.session.get(url, stream=True, headers=headers)
             response.raise_for_status()
             
+            # Servers that ignore the Range header send the whole file again,
+            # and so do servers whose file changed since the .part was written
+            if response.status_code != 206:
+                existing = 0
+            
+            if not existing:
+                validator = self._get_validator(response)
+                if validator:
+                    validatorpath.write_text(validator, encoding='utf-8')
+                else:
+                    validatorpath.unlink(missing_ok=True)
+            
             # Get file size for progress bar
-            total_size = int(response.headers.get('content-length', 0))
+            total_size = existing + int(response.headers.get('content-length', 0))
             
-            # Download with progress bar
-            with open(filepath, 'wb') as f:
-                with tqdm(total=total_size, unit='B', unit_scale=True, desc=filename) as pbar:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            pbar.update(len(chunk))
+            # Download with progress bar; the copy loop runs in shutil on
+            # large chunks straight from the socket instead of iter_content
+            response.raw.decode_content = True
+            with open(partpath, 'ab' if existing else 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                with tqdm.wrapattr(f, 'write', total=total_size, initial=existing,
+                                   desc=filename, disable=not show_progress) as out:
+                    shutil.copyfileobj(response.raw, out, length=CHUNK_SIZE)
             
-            print(f"✓ Downloaded: {filename}")
+            partpath.replace(filepath)
+            validatorpath.unlink(missing_ok=True)
+            tqdm.write(f"✓ Downloaded: {filename}")
             return True
             
         except Exception as e:
-            print(f"✗ Error downloading {url}: {e}")
-            # Remove partial file if it exists
-            if filepath.exists():
-                filepath.unlink()
+            tqdm.write(f"✗ Error downloading {url}: {e}")
+            # Keep the partial file for the next run to resume, unless resume is off
+            if not self.resume:
+                partpath.unlink(missing_ok=True)
+                validatorpath.unlink(missing_ok=True)
             return False
     
     def download_from_html_file(self, html_file_path):
@@ -166,13 +298,13 @@ class FileDownloader:
                 html_content = f.read()
             
             # Extract base URL from HTML if available
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = self.parse_html(html_content)
             base_url = None
             base_tag = soup.find('base', href=True)
             if base_tag:
                 base_url = base_tag['href']
             
-            file_links = self.find_file_links(html_content, base_url)
+            file_links = self.find_file_links(soup, base_url)
             
             if not file_links:
                 print(f"No {self.file_type.upper()} links found in the HTML file.")
@@ -212,6 +344,17 @@ class FileDownloader:
             print(f"Error processing URL: {e}")
             return False
     
+    def _wait_for_host(self, url):
+        """Space out requests to the same host by at least HOST_MIN_INTERVAL seconds"""
+        host = urlparse(url).netloc
+        lock, _ = self._host_locks.setdefault(host, (threading.Lock(), 0.0))
+        with lock:
+            _, last = self._host_locks[host]
+            delay = HOST_MIN_INTERVAL - (time.monotonic() - last)
+            if delay > 0:
+                time.sleep(delay)
+            self._host_locks[host] = (lock, time.monotonic())
+    
     def _download_all_files(self, file_links):
         """Download all file links"""
         successful_downloads = 0
@@ -220,16 +363,40 @@ class FileDownloader:
         print(f"\nStarting download of {len(file_links)} {self.file_type.upper()} files...")
         print(f"Files will be saved to: {self.download_dir.absolute()}")
         
-        for i, file_url in enumerate(file_links, 1):
-            print(f"\n[{i}/{len(file_links)}] ", end="")
-            
-            if self.download_file(file_url):
-                successful_downloads += 1
-            else:
-                failed_downloads += 1
-            
-            # Small delay to be respectful to servers
-            time.sleep(0.5)
+        # Limit concurrent requests to each host so that parallel downloads
+        # stay polite; different hosts proceed independently
+        host_slots = {urlparse(file_url).netloc: threading.Semaphore(2) for file_url in file_links}
+        filenames = self._unique_filenames(file_links)
+        stopping = threading.Event()
+        
+        def download(file_url):
+            with host_slots[urlparse(file_url).netloc]:
+                # Tasks already picked up by a worker are skipped after Ctrl-C,
+                # also when it came while waiting for the host
+                if stopping.is_set():
+                    return False
+                self._wait_for_host(file_url)
+                if stopping.is_set():
+                    return False
+                return self.download_file(file_url, filenames[file_url], show_progress=False)
+        
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = [executor.submit(download, file_url) for file_url in file_links]
+            with tqdm(total=len(file_links), unit='file', desc='Downloading') as pbar:
+                for future in as_completed(futures):
+                    if future.result():
+                        successful_downloads += 1
+                    else:
+                        failed_downloads += 1
+                    pbar.update(1)
+        except KeyboardInterrupt:
+            # Stop at once on Ctrl-C: drop the queued downloads instead of
+            # waiting for all of them to run
+            stopping.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
         
         print(f"\nDownload complete!")
         print(f"✓ Successful: {successful_downloads}")
@@ -244,6 +411,7 @@ def main():
     parser.add_argument('--file-type', default='pdf', help='File extension to download (e.g., pdf, pse, docx, xlsx)')
     parser.add_argument('--download-dir', default='downloads', help='Directory to save files')
     parser.add_argument('--no-resume', action='store_true', help='Don\'t resume interrupted downloads')
+    parser.add_argument('--workers', type=int, default=16, help='Number of files to download in parallel')
     
     args = parser.parse_args()
     
@@ -259,7 +427,8 @@ def main():
     downloader = FileDownloader(
         download_dir=args.download_dir,
         resume=not args.no_resume,
-        file_type=args.file_type
+        file_type=args.file_type,
+        max_workers=args.workers
     )
     
     # Process based on input type